@@ -1,4 +1,8 @@
 import json
+try:
+    import orjson  # Optional, faster json serialization
+except ImportError:
+    orjson = None
 
 
 def load_json(file_name: str) -> list | dict:
@@ -9,6 +13,15 @@ def load_json(file_name: str) -> list | dict:
 
 
 def dump_json(content: list | dict, file_name: str):
-    """Dump a json file"""
-    with open(file_name, 'w') as f:
-        json.dump(content, f, indent=4)
+    """
+    Dump a json file, using 'orjson' if installed or the standard 'json' otherwise
+
+    The output of both differs: 'orjson' writes with indent of 2, non-ASCII characters as raw UTF-8 and NaN/Infinity as
+    null, while 'json' writes with indent of 4, non-ASCII characters as escape sequences and NaN/Infinity as is.
+    """
+    if orjson is None:
+        with open(file_name, 'w') as f:
+            json.dump(content, f, indent=4)
+    else:
+        with open(file_name, 'wb') as f:
+            f.write(orjson.dumps(content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
@@ -4,28 +4,65 @@ Module SensoSysDataSource: Interface to DataLogger
 
 from ebcmeasurements.Base import DataSource, Auxiliary
 from ebcmeasurements.Sensor_Electronic import SensoSysDevices
+from collections import Counter
+from typing import Callable
 from datetime import datetime
+import functools
 import os
+import serial  # Pyserial
 import sys
+import time
 import logging.config
 # Load logging configuration from file
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=32)
+def _load_devices_cache(file_name: str, mtime: float) -> tuple[float, tuple[int, ...]]:
+    """Read the time of the full scan and the found device ids from a cache file, cached by file name and mtime"""
+    content = Auxiliary.load_json(file_name)
+    return float(content['scan_time']), tuple(int(_id) for _id in content['ids'])
+
+
+class SensoSysNoDevicesError(Exception):
+    """Raised if no COM ports or no SensoSys devices are found"""
+
+
+class SensoSysInvalidInputError(ValueError):
+    """Raised if a configuration input is invalid"""
+
+
+class SensoSysAbortError(Exception):
+    """Raised if the user chooses not to continue after scanning"""
+
+
 class SensoSysDataSource(DataSource.DataSourceBase):
+    # Class attribute: time to live in seconds of the found devices of the last full scan, used as cache for scanning
+    _found_devices_cache_ttl = 24 * 3600
+    # Class attribute: interval in seconds to summarize repeated warnings of missing data from a device
+    _missing_data_log_interval = 60.0
+
     def __init__(
             self,
             port: str | None = None,
             output_dir: str | None = None,
             all_devices_ids: list[int] | None = None,
             time_out: float = 0.1,
+            force_rescan: bool = False,
     ):
         """
         Initialize SensoSysDataSource instance
-        :param port: Port number to connect, if None, start a configuration guidance
+        :param port: Port number to connect, if None, start a configuration guidance, otherwise the port is used without
+            scanning available COM ports
         :param output_dir: Output dir to save initialization config and found devices, if None, they will not be saved
         :param all_devices_ids: All possible device's IDs to scan, if None, scan ID from 0 to 255
         :param time_out: Timeout in seconds for serial communication
+        :param force_rescan: If False and all_devices_ids is None, devices found in the last full scan (saved in
+            output dir) are scanned first, and the full scan is skipped if all of them respond; if True, always run
+            the full scan
+        :raises SensoSysNoDevicesError: If no COM ports (configuration by guide) or no devices are found
+        :raises SensoSysInvalidInputError: If the COM port is unavailable or a user input is invalid
+        :raises SensoSysAbortError: If the user chooses not to continue after scanning
         """
         logger.info("Initializing SensoSysDataSource ...")
 
@@ -33,6 +70,8 @@ class SensoSysDataSource(DataSource.DataSourceBase):
         self.port = None
         self.output_dir = output_dir
         self.all_devices_ids = None
+        self._missing_data_counter = Counter()  # Missed samples by (id, name) since the last warning
+        self._missing_data_last_log = {}  # Time of the last warning by (id, name)
 
         # Create output dir if it is not None
         if self.output_dir is None:
@@ -42,51 +81,80 @@ class SensoSysDataSource(DataSource.DataSourceBase):
             if not os.path.exists(self.output_dir):
                 os.makedirs(self.output_dir)
 
-        # Scan available COM port(s)
-        self.available_ports = self._scan_available_ports()
-
         # Set device COM port
         if port is None:
-            self.port = self._get_port_by_guide()  # Configuration by guide
+            # Configuration by guide: scan available COM port(s) and check the port input
+            self.available_ports = self._scan_available_ports()
+            self.port = self._get_port_by_guide()
+            self._check_port_name()
         else:
-            self.port = port  # Configuration by file
-
-        # Check device COM port
-        self._check_port_name()
+            # Configuration by file: the port is not checked, an unavailable port fails at connection
+            self.available_ports = None
+            self.port = port
 
         # Init SensoSys
         logger.info(f"Initializing SensoSysDevices ...")
-        self.sensosys = SensoSysDevices.SensoSys(port=self.port, time_out=time_out)
-
-        # Scan devices
-        if all_devices_ids is None:
-            self.sensosys_devices = self._scan_devices(ids=list(range(0, 255)))  # Scan by id from 00 to FF
-        else:
-            self.sensosys_devices = self._scan_devices(ids=all_devices_ids)  # Scan according to input
+        try:
+            self.sensosys = SensoSysDevices.SensoSys(port=self.port, time_out=time_out)
+        except serial.SerialException as e:
+            raise SensoSysInvalidInputError(f"Unable to connect to the COM port '{self.port}': {e}") from e
+
+        # Resolve the measurement parameters of each SensoHygBar sensor_config once
+        self._hygbar_params_by_config = {
+            cfg: tuple(meta['params']) for cfg, meta in self.sensosys.senso_hygbar_sensor_config.items()}
+
+        # Scan devices, also to a list of [(int id, name, sensor_config, params), ...] to simplify data reading
+        # The cache is only used and updated by unrestricted scans, so that it always holds a full scan result
+        _full_scan = False
+        _cached_ids = None if force_rescan or all_devices_ids is not None else self._load_cached_devices_ids()
+        if _cached_ids is not None:
+            logger.info(f"Scanning devices found in the last full scan: {_cached_ids} ...")
+            self.sensosys_devices, self.sensosys_devices_list = self._scan_devices(
+                ids=_cached_ids)  # Scan according to cache
+            if len(self.sensosys_devices) != len(_cached_ids):
+                logger.info("Not all devices found in the last full scan responded, running the full scan ...")
+                _cached_ids = None
+        if _cached_ids is None:
+            if all_devices_ids is None:
+                self.sensosys_devices, self.sensosys_devices_list = self._scan_devices(
+                    ids=list(range(0, 255)))  # Scan by id from 00 to FF
+                _full_scan = True
+            else:
+                self.sensosys_devices, self.sensosys_devices_list = self._scan_devices(
+                    ids=all_devices_ids)  # Scan according to input
         self.all_devices_ids = self.sensosys_devices.keys()
         logger.info(f"Found SensoSys devices: \n"
                     f"{self.sensosys_devices} \n"
                     f"Number of found devices: {len(self.sensosys_devices)}")
 
-        # Possible quit after scanning
-        if len(self.sensosys_devices) == 0:
-            logger.error("No devices found, please check the connection, exiting ...")
-            sys.exit(0)
-        else:
-            _continue = self._get_if_continue()
-            if not _continue:
-                logger.info("Exiting manually ...")
-                sys.exit(0)
+        # Possible quit after scanning, release the COM port so that the caller can retry
+        try:
+            if len(self.sensosys_devices) == 0:
+                raise SensoSysNoDevicesError("No devices found, please check the connection")
+            else:
+                _continue = self._get_if_continue()
+                if not _continue:
+                    raise SensoSysAbortError("Initialization aborted by user")
+        except (SensoSysNoDevicesError, SensoSysInvalidInputError, SensoSysAbortError):
+            self.sensosys.close_serial_connection()
+            raise
 
         # Save scan devices result to file
         if self.output_dir is not None:
             _file_path = os.path.join(self.output_dir, 'FoundDevices.json')
             logger.info(f"Saving found devices to: {_file_path} ...")
             Auxiliary.dump_json(self.sensosys_devices, _file_path)
-
-        # Convert scanned devices to a list of [(id, name, sensor_config), ...] to simplify data reading
-        self.sensosys_devices_list = [
-            (k, v['instrument_name'], v.get('sensor_config')) for k, v in self.sensosys_devices.items()]
+            if _full_scan:
+                # Refresh the cache only by a full scan, the scan time is used for its time to live
+                _cache_path = os.path.join(self.output_dir, 'FoundDevicesCache.json')
+                logger.info(f"Saving found devices of the full scan to: {_cache_path} ...")
+                Auxiliary.dump_json(
+                    {'scan_time': time.time(), 'ids': [_id for _id, _, _, _ in self.sensosys_devices_list]},
+                    _cache_path
+                )
+
+        # Bind a data reader and variable names to each device: [(reader, names), ...]
+        self._device_readers = [self._get_device_reader(*dev) for dev in self.sensosys_devices_list]
 
         # Set all_data_names
         self._all_variable_names = self._get_all_variable_names()
@@ -105,123 +173,184 @@ class SensoSysDataSource(DataSource.DataSourceBase):
         if self.port in self.available_ports:
             logger.info(f"Successfully set COM port to '{self.port}'")
         else:
-            logger.error(f"The COM port '{self.port}' is unavailable, exiting ...")
-            sys.exit(1)
+            raise SensoSysInvalidInputError(f"The COM port '{self.port}' is unavailable")
 
-    def _scan_devices(self, ids: list[int]) -> dict[str: dict]:
-        """Scan devices by ids"""
-        available_devices = {}
+    def _load_cached_devices_ids(self) -> list[int] | None:
+        """Load ids of devices found in the last full scan, None if no valid cache is available"""
+        if self.output_dir is None:
+            return None
+        _file_path = os.path.join(self.output_dir, 'FoundDevicesCache.json')
+        if not os.path.isfile(_file_path):
+            logger.info(f"No found devices of a full scan available in: {_file_path}")
+            return None
+        try:
+            _scan_time, _ids = _load_devices_cache(_file_path, os.path.getmtime(_file_path))
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning(f"Unable to load found devices of the last full scan '{_file_path}': {e}")
+            return None
+        if time.time() - _scan_time > self._found_devices_cache_ttl:
+            logger.info(f"Found devices of the last full scan are expired: {_file_path}")
+            return None
+        return list(_ids) if len(_ids) > 0 else None
+
+    def _scan_devices(self, ids: list[int]) -> tuple[dict[str: dict], list[tuple]]:
+        """
+        Scan devices by ids
+        :param ids: Device's IDs to scan
+        :return: Dict of found devices with str id as key, and list of [(int id, name, sensor_config, params), ...]
+            with params resolved from the sensor_config for SensoHygBar, otherwise None
+        """
+        # Phase 1: discover devices by reading the instrument name of each id
+        found_devices = []  # List of (id, device name response)
+        log_scanning = logger.isEnabledFor(logging.DEBUG)  # Per-id messages only in debug level
         for _id in ids:
-            logger.info(f"Scanning address ID {_id} ...")
+            if log_scanning:
+                logger.debug("Scanning address ID %d ...", _id)
             device_name_response = self.sensosys.read_instrument_name(_id)
             if device_name_response is not None:
                 # Get and convert instrument name to upper case
                 device_name_response['instrument_name'] = device_name_response['instrument_name'].upper().strip()
-                instrument_name = device_name_response['instrument_name']
                 logger.info(
-                    f"Found device with ID '{_id}', instrument name '{instrument_name}'")
-
-                # Read common device information
-                device_responses = device_name_response  # Dict for all responses
-                device_responses.update(self.sensosys.read_serial_number(_id))  # Serial number
-                device_responses.update(self.sensosys.read_expired_calibration_date(_id))  # Calibration expired data
-                device_responses.update(self.sensosys.read_battery_state(_id))  # Battery state
-
-                # Read special device information
-                if instrument_name.startswith('ANEMO'):
-                    device_responses.update(self.sensosys.senso_anemo_read_configuration(_id))
-                    device_responses.update(self.sensosys.senso_anemo_read_indicator(_id))
-                elif instrument_name.startswith('THERM'):
-                    device_responses.update(self.sensosys.senso_therm_read_configuration(_id))
-                    for _ch in range(1, 5):
-                        device_responses.update({
-                            f'senso_therm_indicator_channel_{_ch}': self.sensosys.senso_therm_read_indicator(
-                                _id, _ch).get('senso_therm_indicator')
-                        })
-                elif instrument_name.startswith(('HYGRO', 'HIGRO')):
-                    device_responses.update(self.sensosys.senso_hygbar_read_configuration(_id))
-                else:
-                    raise ValueError(f"Invalid instrument name '{instrument_name}'")
-
-                # Convert calibration expired date format
-                exp_date = device_responses.get('calibration_expired_date')
-                date_formats = ['%d-%m-%y', '%d.%m.%y']
-                if exp_date is not None:
-                    for _fmt in date_formats:
-                        try:
-                            device_responses['calibration_expired_date'] = datetime.strptime(
-                                exp_date, _fmt).strftime('%Y-%m-%d')
-                            break  # Exit the loop once the date is successfully parsed
-                        except ValueError:
-                            continue  # If parsing fails, continue to the next format
-
-                # Update available devices
-                available_devices.update({str(_id): device_responses})
-        return available_devices
+                    f"Found device with ID '{_id}', instrument name '{device_name_response['instrument_name']}'")
+                found_devices.append((_id, device_name_response))
+
+        # Phase 2: read information of found devices, one request after another on the serial bus
+        available_devices = {}
+        available_devices_list = []
+        for _id, device_name_response in found_devices:
+            device_responses = self._read_device_information(_id, device_name_response)
+            available_devices[str(_id)] = device_responses
+            _name, _sensor_config = device_responses['instrument_name'], device_responses.get('sensor_config')
+            _params = self._hygbar_params_by_config[_sensor_config] if _name.startswith(('HYGRO', 'HIGRO')) else None
+            available_devices_list.append((_id, _name, _sensor_config, _params))
+        logger.info("Scanned %d IDs, found %d devices", len(ids), len(available_devices))
+        return available_devices, available_devices_list
+
+    def _read_device_information(self, _id: int, device_name_response: dict) -> dict:
+        """Read common and special information of a found device"""
+        instrument_name = device_name_response['instrument_name']
+
+        # Read common device information
+        device_responses = device_name_response  # Dict for all responses
+        device_responses |= self.sensosys.read_serial_number(_id)  # Serial number
+        device_responses |= self.sensosys.read_expired_calibration_date(_id)  # Calibration expired data
+        device_responses |= self.sensosys.read_battery_state(_id)  # Battery state
+
+        # Read special device information
+        if instrument_name.startswith('ANEMO'):
+            device_responses |= self.sensosys.senso_anemo_read_configuration(_id)
+            device_responses |= self.sensosys.senso_anemo_read_indicator(_id)
+        elif instrument_name.startswith('THERM'):
+            device_responses |= self.sensosys.senso_therm_read_configuration(_id)
+            for _ch in range(1, 5):
+                _indicator_response = self.sensosys.senso_therm_read_indicator(_id, _ch)
+                device_responses[f'senso_therm_indicator_channel_{_ch}'] = (
+                    None if _indicator_response is None else _indicator_response.get('senso_therm_indicator'))
+        elif instrument_name.startswith(('HYGRO', 'HIGRO')):
+            device_responses |= self.sensosys.senso_hygbar_read_configuration(_id)
+        else:
+            raise ValueError(f"Invalid instrument name '{instrument_name}'")
+
+        # Convert calibration expired date format
+        exp_date = device_responses.get('calibration_expired_date')
+        if exp_date is not None:
+            # Detect the date format by its separator, e.g. 'DD-MM-YY' or 'DD.MM.YY'
+            date_format = '%d-%m-%y' if '-' in exp_date else '%d.%m.%y' if '.' in exp_date else None
+            if date_format is None:
+                logger.warning(f"Unknown format of calibration expired date '{exp_date}'")
+            else:
+                try:
+                    device_responses['calibration_expired_date'] = datetime.strptime(
+                        exp_date, date_format).strftime('%Y-%m-%d')
+                except ValueError:
+                    logger.warning(f"Invalid calibration expired date '{exp_date}'")
+        return device_responses
+
+    def _get_device_reader(
+            self,
+            _id: int,
+            _name: str,
+            _sensor_config: str | None,
+            _params: tuple[str, ...] | None
+    ) -> tuple[Callable[[dict], None], tuple[str, ...]]:
+        """Get the data reader and variable names of a found instrument"""
+        if _name.startswith('ANEMO'):
+            _read, _args = self.sensosys.senso_anemo_read_measurement_data, (_id,)
+            _keys = ('t_a', 'v', 'v_star')
+            _names = (f't_a_{_id}', f'v_{_id}', f'vstar_{_id}')
+        elif _name.startswith('THERM'):
+            _read, _args = self.sensosys.senso_therm_read_temperatures_enabled_channels, (_id,)
+            _keys = ('t_a', 't_g', 't_w', 't_s')
+            _names = (f't_a_{_id}', f't_g_{_id}', f't_w_{_id}', f't_s_{_id}')
+        elif _name.startswith(('HYGRO', 'HIGRO')):
+            _read, _args = self.sensosys.senso_hygbar_read_measurement_data, (_id, _sensor_config)
+            _keys = _params
+            _names = tuple(f'{p}_{_id}' for p in _params)
+        else:
+            raise ValueError(f"Invalid instrument name '{_name}'")
+
+        def _reader(data: dict):
+            """Read measurement data of the instrument into data dict, unchanged if no data received"""
+            resp = _read(*_args)
+            if resp is None:
+                self._warn_missing_data(_id, _name)
+            else:
+                data.update(zip(_names, map(resp.get, _keys)))
+                if (_id, _name) in self._missing_data_counter:
+                    self._report_pending_missing_data(_id, _name)
+
+        return _reader, _names
 
     def _get_all_variable_names(self) -> tuple[str, ...]:
         """Get all measurement parameters for instruments that found"""
-        names = ()
-        for _id, _name, _sensor_config in self.sensosys_devices_list:
-            if _name.startswith('ANEMO'):
-                names += (f't_a_{_id}', f'v_{_id}', f'vstar_{_id}')
-            elif _name.startswith('THERM'):
-                names += (f't_a_{_id}', f't_g_{_id}', f't_w_{_id}', f't_s_{_id}')
-            elif _name.startswith(('HYGRO', 'HIGRO')):
-                names += tuple(f'{p}_{_id}' for p in self.sensosys.senso_hygbar_sensor_config[_sensor_config]['params'])
-            else:
-                raise ValueError(f"Invalid instrument name '{_name}'")
-        return names
+        names = []
+        for _, _names in self._device_readers:
+            names.extend(_names)
+        return tuple(names)
 
     def read_data(self) -> dict:
         """Read all measurement data for instruments that found"""
         data = {}
-        for _id, _name, _sensor_config in self.sensosys_devices_list:
-            _id = int(_id)  # Convert str id to int
-            if _name.startswith('ANEMO'):
-                resp = self.sensosys.senso_anemo_read_measurement_data(_id)
-                if resp is None:
-                    logger.warning(f"No data received from {_id} - {_name} ...")
-                else:
-                    data.update({
-                        f't_a_{_id}': resp.get('t_a'),
-                        f'v_{_id}': resp.get('v'),
-                        f'vstar_{_id}': resp.get('v_star'),
-                    })
-            elif _name.startswith('THERM'):
-                resp = self.sensosys.senso_therm_read_temperatures_enabled_channels(_id)
-                if resp is None:
-                    logger.warning(f"No data received from {_id} - {_name} ...")
-                else:
-                    data.update({
-                        f't_a_{_id}': resp.get('t_a'),
-                        f't_g_{_id}': resp.get('t_g'),
-                        f't_w_{_id}': resp.get('t_w'),
-                        f't_s_{_id}': resp.get('t_s'),
-                    })
-            elif _name.startswith(('HYGRO', 'HIGRO')):
-                resp = self.sensosys.senso_hygbar_read_measurement_data(_id, _sensor_config)
-                if resp is None:
-                    logger.warning(f"No data received from {_id} - {_name} ...")
-                else:
-                    data.update({
-                        f'{p}_{_id}': resp.get(p)
-                        for p in self.sensosys.senso_hygbar_sensor_config[_sensor_config]['params']
-                    })
-            else:
-                raise ValueError(f"Invalid instrument name '{_name}'")
+        for _reader, _ in self._device_readers:
+            _reader(data)
         return data
 
+    def _warn_missing_data(self, _id: int, _name: str):
+        """Log a warning of missing data, repeated warnings of a device are summarized once per log interval"""
+        key = (_id, _name)
+        self._missing_data_counter[key] += 1
+        now = time.monotonic()
+        last_log = self._missing_data_last_log.get(key)
+        if last_log is None or now - last_log >= self._missing_data_log_interval:
+            missed = self._missing_data_counter.pop(key)
+            if missed == 1:
+                logger.warning("No data received from %s - %s ...", _id, _name)
+            else:
+                logger.warning(
+                    "No data received from %s - %s, missed %d samples in the last %.0f s",
+                    _id, _name, missed, now - last_log)
+            self._missing_data_last_log[key] = now
+
+    def _report_pending_missing_data(self, _id: int, _name: str):
+        """Log the missed samples of a device not reported yet after data is received again, once per log interval"""
+        key = (_id, _name)
+        now = time.monotonic()
+        last_log = self._missing_data_last_log[key]
+        if now - last_log >= self._missing_data_log_interval:
+            logger.warning(
+                "Data received again from %s - %s, missed %d samples in the last %.0f s",
+                _id, _name, self._missing_data_counter.pop(key), now - last_log)
+            self._missing_data_last_log[key] = now
+
     @staticmethod
     def _scan_available_ports():
         """Scan available COM ports"""
         logger.info(f"Scanning available COM port(s) ...")
         available_ports = SensoSysDevices.scan_com_ports()
         if available_ports is None:
-            logging.error("No available ports found, exiting ...")
-            sys.exit()
+            raise SensoSysNoDevicesError("No available ports found")
         else:
-            logging.info(f"Found available port(s): {available_ports}")
+            logger.info(f"Found available port(s): {available_ports}")
             return available_ports
 
     @staticmethod
@@ -233,8 +362,7 @@ class SensoSysDataSource(DataSource.DataSourceBase):
         elif input_str == 'n':
             return False
         else:
-            logger.error(f"Invalid input '{input_str}', it can only be 'y' or 'n', exiting ...")
-            sys.exit(1)
+            raise SensoSysInvalidInputError(f"Invalid input '{input_str}', it can only be 'y' or 'n'")
 
     @staticmethod
     def _get_port_name() -> str:
@@ -251,19 +379,25 @@ class SensoSysDataSource(DataSource.DataSourceBase):
         elif input_str == 'n':
             return False
         else:
-            logger.error(f"Invalid input '{input_str}', it can only be 'y' or 'n', exiting ...")
-            sys.exit(1)
+            raise SensoSysInvalidInputError(f"Invalid input '{input_str}', it can only be 'y' or 'n'")
 
 
 if __name__ == '__main__':
     from ebcmeasurements.Base import DataOutput, DataLogger
 
     # Init SensoSysDataSource
-    senso_sys_source = SensoSysDataSource(
-        port=None,
-        output_dir='Test',
-        all_devices_ids=None
-    )
+    try:
+        senso_sys_source = SensoSysDataSource(
+            port=None,
+            output_dir='Test',
+            all_devices_ids=None
+        )
+    except SensoSysAbortError:
+        logger.info("Exiting manually ...")
+        sys.exit(0)
+    except (SensoSysNoDevicesError, SensoSysInvalidInputError) as e:
+        logger.error(f"{e}, exiting ...")
+        sys.exit(1)
     print(f"All data names of senso_sys_source: {senso_sys_source.all_variable_names}")
 
     # Init csv output
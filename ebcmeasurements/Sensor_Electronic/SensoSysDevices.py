@@ -102,10 +102,27 @@ class SensoSys:
                 logger.info(f"Established serial connection: {self.ser}")
             except serial.SerialException as e:
                 logger.error(f"Serial connection error: {e}")
-                sys.exit(1)
+                raise
+            self._set_low_latency()
         else:
             logger.info(f"Serial connection already established: {self.ser}")
 
+    def _set_low_latency(self):
+        """
+        Activate the low latency mode of the serial port, best-effort
+
+        The mode is only supported by pyserial on Linux. System-wide settings, e.g. the latency timer of USB-serial
+        converters, are not changed.
+        """
+        if not sys.platform.startswith('linux'):
+            logger.debug(f"Setting low latency is not supported on '{sys.platform}'")
+            return
+        try:
+            self.ser.set_low_latency_mode(True)
+            logger.debug(f"Activated low latency mode of {self.port}")
+        except (AttributeError, ValueError, OSError) as e:
+            logger.debug(f"Unable to activate low latency mode of {self.port}: {e}")
+
     def close_serial_connection(self):
         """Close the serial connection"""
         if self.ser and self.ser.is_open: